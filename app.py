@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
 import numpy as np
 
 # 1. Header & Configuration
@@ -13,31 +12,167 @@ st.set_page_config(
 st.title("⚓ PortSync: Just-In-Time Logistics Optimizer")
 st.markdown("Optimize your fleet's arrival to reduce demurrage costs and save fuel.")
 
+# Chart Spec
+# Hand-written Vega-Lite spec for the Top 10 chart; data is attached at render time.
+# Static summary: no zoom/pan selections.
+VL_SPEC = {
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "Vessel_ID", "type": "nominal", "sort": "-y", "title": "Vessel"},
+        "y": {"field": "Cost", "type": "quantitative", "title": "Cost (USD)"},
+        "color": {
+            "field": "Cost_Type",
+            "type": "nominal",
+            "legend": {"title": "Cost Scenario"},
+            "scale": {"scheme": "tableau10"}
+        },
+        "tooltip": [
+            {"field": "Vessel_ID", "type": "nominal"},
+            {"field": "Cost", "type": "quantitative", "format": "$,.0f"}
+        ]
+    },
+    "height": 400
+}
+
+def build_spec(chart_data):
+    return {**VL_SPEC, "data": {"values": chart_data.to_dict(orient="records")}}
+
+# Table Formatting
+# Columns shown in the data log; Optimal_Speed_Knots and Fuel_Consumed_Tons stay out of the payload.
+DISPLAY_COLS = [
+    'Vessel_ID', 'Arrival_Date', 'Queue_Size', 'Waiting_Days', 'Actual_Speed_Knots',
+    'Demurrage_Cost', 'Total_Fuel_Cost', 'Potential_Fuel_Savings_USD'
+]
+
+PAGE_ROWS = 25
+
+FMT = {
+    'Demurrage_Cost': '${:,.0f}',
+    'Total_Fuel_Cost': '${:,.0f}',
+    'Potential_Fuel_Savings_USD': '${:,.0f}',
+    'Waiting_Days': '{:.1f} days',
+    'Actual_Speed_Knots': '{:.1f} kn'
+}
+
+# Highlight high Demurrage: CSS column built with one boolean-mask assignment, no per-cell calls
+def highlight_demurrage(s):
+    css = np.full(len(s), '', dtype=object)
+    css[s.values > 50000] = 'background-color: #ffcccc'
+    return css
+
+# Format only changes the displayed text, so the columns stay numeric and sort correctly in the grid
+def style_log(styler):
+    return styler.format(FMT).apply(highlight_demurrage, subset=['Demurrage_Cost'])
+
 # Load Data
 @st.cache_data
 def load_data():
     try:
-        df = pd.read_csv('port_traffic.csv')
+        df = pd.read_parquet('port_traffic.parquet')
         return df
     except FileNotFoundError:
-        st.error("Data file 'port_traffic.csv' not found. Please run the generation script.")
+        st.error("Data file 'port_traffic.parquet' not found. Please run the generation script.")
         return pd.DataFrame()
 
+# Derived Frames
+# Cost columns, top-10 selection, the long-format chart data and the headline
+# metrics only depend on the dataset, so sidebar interactions should not recompute them.
+@st.cache_data(ttl=None, max_entries=4)
+def compute_chart_frames(df):
+    # Actual Total Cost = Demurrage_Cost + Total_Fuel_Cost
+    # Optimized Total Cost = Total_Fuel_Cost - Potential_Fuel_Savings_USD (Assuming 0 demurrage if optimized)
+    # Rank on the raw arrays and only materialize the cost columns for the selected rows.
+    actual_cost = df['Demurrage_Cost'].values + df['Total_Fuel_Cost'].values
+    k = min(10, len(actual_cost))
+    idx = np.argpartition(actual_cost, -k)[-k:]
+    idx = idx[np.argsort(-actual_cost[idx])]
+    top_10_expensive = df.iloc[idx]
+    top_10_expensive = top_10_expensive.assign(
+        Actual_Total_Cost=actual_cost[idx],
+        Optimized_Total_Cost=top_10_expensive['Total_Fuel_Cost'].values - top_10_expensive['Potential_Fuel_Savings_USD'].values
+    )
+
+    # Prepare data for Vega-Lite (melt/long format)
+    chart_data = top_10_expensive[['Vessel_ID', 'Actual_Total_Cost', 'Optimized_Total_Cost']].melt(
+        id_vars='Vessel_ID',
+        var_name='Cost_Type',
+        value_name='Cost'
+    )
+    chart_data['Cost_Type'] = chart_data['Cost_Type'].astype('category')
+    # Identifies this chart data across reruns without rehashing it each time
+    chart_key = int(pd.util.hash_pandas_object(chart_data, index=False).sum())
+
+    # Headline metrics
+    # Waited means Waiting_Days > 0 (or Queue_Size > 0)
+    metrics = {
+        'demurrage': float(df['Demurrage_Cost'].values.sum(dtype=np.float64)),
+        'savings': float(df['Potential_Fuel_Savings_USD'].values.sum(dtype=np.float64)),
+        'waited': int((df['Waiting_Days'].values > 0).sum()),
+        'total': len(df)
+    }
+
+    # Data log: project to the displayed columns
+    df = df[DISPLAY_COLS]
+    return df, chart_data, chart_key, metrics
+
+# Recommendation Engine
+# Runs as a fragment: changing the sidebar inputs only reruns this panel,
+# not the metrics, chart and table on the main page.
+@st.fragment
+def recommendation_panel():
+    st.header("🚀 JIT Recommendation Engine")
+    st.markdown("Calculate optimal speed to avoid queuing.")
+    
+    distance_nm = st.number_input("Distance to Port (nm)", min_value=100, value=1000, step=50)
+    current_queue = st.number_input("Current Queue (ships)", min_value=0, value=2, step=1)
+    
+    # Logic: If Queue > 1, suggest slowing down by 20% to save fuel.
+    if current_queue > 1:
+        recommendation = "SLOW STEAMING RECOMMENDED"
+        speed_factor = 0.8
+        alert_type = "success"
+    else:
+        recommendation = "MAINTAIN SPEED"
+        speed_factor = 1.0
+        alert_type = "info"
+        
+    st.subheader(f"Status: {recommendation}")
+    
+    if current_queue > 1:
+        st.info(f"Reduce speed by 20% to arrive after queue clears.")
+        
+        # Money Saved Estimate
+        # Rough calc: 15% savings on fuel for the trip? Or just a fixed estimate?
+        # Prompt: "Display a 'Money Saved' estimate box in the sidebar."
+        # Let's use a simple formula based on distance and assumed fuel consumption.
+        # Assume 30 tons/day at normal speed.
+        # Normal days = Distance / (14 knots * 24)
+        # Fuel cost = Normal days * 30 * $600
+        # Savings = Fuel cost * 0.15
+        
+        avg_speed = 14.0
+        days_at_sea = distance_nm / (avg_speed * 24)
+        est_fuel_cost = days_at_sea * 30 * 600
+        est_savings = est_fuel_cost * 0.15
+        
+        st.metric("Estimated Fuel Savings", f"${est_savings:,.0f}")
+    else:
+        st.write("Port is clear. Proceed at normal service speed.")
+
 df = load_data()
 
 if not df.empty:
+    df, chart_data, chart_key, metrics = compute_chart_frames(df)
+
     # 2. Top Row (Metrics)
     # Total Demurrage Wasted
-    total_demurrage = df['Demurrage_Cost'].sum()
+    total_demurrage = metrics['demurrage']
     
     # Potential Fuel Savings
-    total_savings = df['Potential_Fuel_Savings_USD'].sum()
+    total_savings = metrics['savings']
     
     # Fleet Efficiency Score (100 - % of ships that waited)
-    # Waited means Waiting_Days > 0 (or Queue_Size > 0)
-    ships_waited = df[df['Waiting_Days'] > 0].shape[0]
-    total_ships = df.shape[0]
-    efficiency_score = 100 - (ships_waited / total_ships * 100)
+    efficiency_score = 100 - (metrics['waited'] / metrics['total'] * 100)
     
     col1, col2, col3 = st.columns(3)
     
@@ -68,95 +203,29 @@ if not df.empty:
 
     # 3. Main Visual: Actual Cost vs Optimized Cost
     # Top 10 most expensive trips (by Demurrage + Fuel Cost)
-    # We need to calculate Actual Total Cost and Optimized Total Cost
-    # Actual Total Cost = Demurrage_Cost + Total_Fuel_Cost
-    # Optimized Total Cost = Total_Fuel_Cost - Potential_Fuel_Savings_USD (Assuming 0 demurrage if optimized)
-    
-    # Re-calculate Total_Fuel_Cost if not in CSV (it was calculated in generation but maybe not saved or we want to be sure)
-    # The generation script saved 'Total_Fuel_Cost' so we can use it.
-    
-    df['Actual_Total_Cost'] = df['Demurrage_Cost'] + df['Total_Fuel_Cost']
-    df['Optimized_Total_Cost'] = df['Total_Fuel_Cost'] - df['Potential_Fuel_Savings_USD']
-    
-    top_10_expensive = df.nlargest(10, 'Actual_Total_Cost')
-    
-    # Prepare data for Altair (melt/long format)
-    chart_data = top_10_expensive[['Vessel_ID', 'Actual_Total_Cost', 'Optimized_Total_Cost']].melt(
-        id_vars='Vessel_ID', 
-        var_name='Cost_Type', 
-        value_name='Cost'
-    )
     
     st.subheader("Top 10 Most Expensive Voyages: Actual vs. Optimized")
     
-    chart = alt.Chart(chart_data).mark_bar().encode(
-        x=alt.X('Vessel_ID', sort='-y', title='Vessel'),
-        y=alt.Y('Cost', title='Cost (USD)'),
-        color=alt.Color('Cost_Type', legend=alt.Legend(title="Cost Scenario"), scale=alt.Scale(scheme='tableau10')),
-        tooltip=['Vessel_ID', 'Cost_Type', alt.Tooltip('Cost', format='$,.0f')]
-    ).properties(
-        height=400
-    ).interactive()
-    
-    st.altair_chart(chart, use_container_width=True)
+    # Reuse the spec across reruns until the underlying chart data changes
+    if st.session_state.get('chart_key') != chart_key:
+        st.session_state['chart_spec'] = build_spec(chart_data)
+        st.session_state['chart_key'] = chart_key
+    st.vega_lite_chart(spec=st.session_state['chart_spec'], use_container_width=True)
 
     # 4. Sidebar (The Recommendation Engine)
-    st.sidebar.header("🚀 JIT Recommendation Engine")
-    st.sidebar.markdown("Calculate optimal speed to avoid queuing.")
-    
-    distance_nm = st.sidebar.number_input("Distance to Port (nm)", min_value=100, value=1000, step=50)
-    current_queue = st.sidebar.number_input("Current Queue (ships)", min_value=0, value=2, step=1)
-    
-    # Logic: If Queue > 1, suggest slowing down by 20% to save fuel.
-    if current_queue > 1:
-        recommendation = "SLOW STEAMING RECOMMENDED"
-        speed_factor = 0.8
-        alert_type = "success"
-    else:
-        recommendation = "MAINTAIN SPEED"
-        speed_factor = 1.0
-        alert_type = "info"
-        
-    st.sidebar.subheader(f"Status: {recommendation}")
-    
-    if current_queue > 1:
-        st.sidebar.info(f"Reduce speed by 20% to arrive after queue clears.")
-        
-        # Money Saved Estimate
-        # Rough calc: 15% savings on fuel for the trip? Or just a fixed estimate?
-        # Prompt: "Display a 'Money Saved' estimate box in the sidebar."
-        # Let's use a simple formula based on distance and assumed fuel consumption.
-        # Assume 30 tons/day at normal speed.
-        # Normal days = Distance / (14 knots * 24)
-        # Fuel cost = Normal days * 30 * $600
-        # Savings = Fuel cost * 0.15
-        
-        avg_speed = 14.0
-        days_at_sea = distance_nm / (avg_speed * 24)
-        est_fuel_cost = days_at_sea * 30 * 600
-        est_savings = est_fuel_cost * 0.15
-        
-        st.sidebar.metric("Estimated Fuel Savings", f"${est_savings:,.0f}")
-    else:
-        st.sidebar.write("Port is clear. Proceed at normal service speed.")
+    with st.sidebar:
+        recommendation_panel()
 
     # 5. Data Table
     st.subheader("Voyage Data Log")
     
-    # Highlight high Demurrage
-    # We'll use pandas styling
-    def highlight_demurrage(val):
-        color = 'red' if val > 50000 else 'black'
-        return f'color: {color}'
+    # Style only the first page by default; the styler cost scales with displayed rows
+    rows = len(df)
+    if rows > PAGE_ROWS and not st.toggle(f"Show all {rows} voyages", value=False):
+        rows = PAGE_ROWS
 
     st.dataframe(
-        df.style.format({
-            'Demurrage_Cost': '${:,.0f}',
-            'Total_Fuel_Cost': '${:,.0f}',
-            'Potential_Fuel_Savings_USD': '${:,.0f}',
-            'Waiting_Days': '{:.1f} days',
-            'Actual_Speed_Knots': '{:.1f} kn'
-        }).applymap(lambda x: 'background-color: #ffcccc' if x > 50000 else '', subset=['Demurrage_Cost']),
+        df.head(rows).style.pipe(style_log),
         use_container_width=True
     )
 
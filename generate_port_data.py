@@ -1,10 +1,31 @@
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_data():
+def compute_costs(waiting_days, fuel_tons, fuel_price_per_ton):
+    """
+    Derives demurrage, fuel cost and fuel savings from the raw ndarrays,
+    using in-place ufuncs to avoid temporaries.
+    """
+    # Demurrage_Cost: Waiting_Days * $30,000
+    demurrage = waiting_days * 30000
+    
+    # Widen to int32 first: 800 tons * $600 overflows int16
+    fuel_cost = fuel_tons.astype(np.int32)
+    fuel_cost *= fuel_price_per_ton
+    
+    # Savings = Fuel_Cost * 0.15 * Waiting_Days
+    savings = fuel_cost * 0.15
+    savings *= waiting_days
+    np.round(savings, 2, out=savings)
+    
+    return demurrage, fuel_cost, savings
+
+def generate_data(export_csv=False):
     """
     Generates a synthetic dataset for PortSync representing 100 tanker voyages.
+    Set export_csv to also write a CSV copy for debugging.
     """
     np.random.seed(42) # Ensure reproducibility
     n_vessels = 100
@@ -15,23 +36,22 @@ def generate_data():
     # 2. Arrival_Date (Last 3 months)
     end_date = datetime.now()
     start_date = end_date - timedelta(days=90)
-    arrival_dates = [start_date + timedelta(days=np.random.randint(0, 90)) for _ in range(n_vessels)]
-    arrival_dates.sort() # Sort by date for realism
+    offsets = np.random.randint(0, 90, n_vessels)
+    arrival_dates = pd.to_datetime(start_date) + pd.to_timedelta(np.sort(offsets), unit='D') # Sorted by date for realism
     
     # 3. Queue_Size (0-5) with specific weights
     # Weights: 0=30%, 1-2=50%, 3-5=20%
     # 0: 30%, 1: 25%, 2: 25%, 3: 6.6%, 4: 6.7%, 5: 6.7% (approx to sum to 20%)
     queue_probs = [0.30, 0.25, 0.25, 0.07, 0.07, 0.06] 
-    queue_sizes = np.random.choice([0, 1, 2, 3, 4, 5], size=n_vessels, p=queue_probs)
+    # Inverse-CDF sampling: index of the first cumulative weight above a uniform draw
+    cum = np.cumsum(queue_probs)
+    cum /= cum[-1] # Guard against float drift leaving the last bin below 1.0
+    queue_sizes = np.searchsorted(cum, np.random.random(n_vessels), side='right').astype(np.int8)
     
     # 4. Waiting_Days
     # If Queue=0, then 0. If Queue>0, random float 1.0-4.0
-    waiting_days = []
-    for q in queue_sizes:
-        if q == 0:
-            waiting_days.append(0.0)
-        else:
-            waiting_days.append(np.round(np.random.uniform(1.0, 4.0), 2))
+    draws = np.round(np.random.uniform(1.0, 4.0, size=n_vessels), 2)
+    waiting_days = np.where(queue_sizes == 0, 0.0, draws)
     
     # 5. Actual_Speed_Knots (Normal dist around 14.0)
     actual_speeds = np.round(np.random.normal(14.0, 1.0, n_vessels), 1)
@@ -44,14 +64,17 @@ def generate_data():
         'Waiting_Days': waiting_days,
         'Actual_Speed_Knots': actual_speeds
     })
+    df['Vessel_ID'] = df['Vessel_ID'].astype('category')
     
-    # --- Business Logic (Calculated Columns) ---
+    # Downcast to the narrowest dtypes that hold the value ranges
+    df['Queue_Size'] = df['Queue_Size'].astype('int8')
+    df['Waiting_Days'] = df['Waiting_Days'].astype('float32')
+    df['Actual_Speed_Knots'] = df['Actual_Speed_Knots'].astype('float32')
     
-    # Demurrage_Cost: Waiting_Days * $30,000
-    df['Demurrage_Cost'] = df['Waiting_Days'] * 30000
+    # --- Business Logic (Calculated Columns) ---
     
     # Fuel_Consumed_Tons: Random between 500-800
-    df['Fuel_Consumed_Tons'] = np.random.randint(500, 801, size=n_vessels)
+    df['Fuel_Consumed_Tons'] = np.random.randint(500, 801, size=n_vessels).astype('int16')
     
     # Optimal_Speed_Knots
     # Simplification: Just multiply Actual_Speed by 0.75 for rows with waiting time (Queue > 0).
@@ -69,7 +92,6 @@ def generate_data():
     # This implies the savings is proportional to the waiting time we are avoiding by slowing down.
     # Let's calculate Fuel Cost first. Price per ton = $600.
     fuel_price_per_ton = 600
-    df['Total_Fuel_Cost'] = df['Fuel_Consumed_Tons'] * fuel_price_per_ton
     
     # Savings: 15% of Total Fuel Cost * Waiting Days? 
     # Or is it 15% savings on the voyage fuel for every day of delay?
@@ -77,23 +99,33 @@ def generate_data():
     # If I wait 2 days, and I slow down to arrive 2 days later, I avoid 2 days of delay.
     # So I save 15% * 2 = 30% of fuel cost? That seems high but let's follow the logic.
     # Let's cap it reasonably or just use the formula: Savings = Fuel_Cost * 0.15 * Waiting_Days
-    # Only applicable if Queue > 0.
-    
-    df['Potential_Fuel_Savings_USD'] = np.where(
-        df['Queue_Size'] > 0,
-        np.round(df['Total_Fuel_Cost'] * 0.15 * df['Waiting_Days'], 2),
-        0.0
+    # Only applicable if Queue > 0; Waiting_Days is already 0 otherwise, so no mask is needed.
+    # Use the float64 waiting days so cents survive; only the stored columns are downcast
+    demurrage, fuel_cost, savings = compute_costs(
+        waiting_days, df['Fuel_Consumed_Tons'].values, fuel_price_per_ton
     )
+    df.insert(df.columns.get_loc('Fuel_Consumed_Tons'), 'Demurrage_Cost', demurrage.astype(np.float32)) # Keep the original column order
+    df['Total_Fuel_Cost'] = fuel_cost
+    df['Potential_Fuel_Savings_USD'] = savings
     
     # Clean up temp columns if needed, but Total_Fuel_Cost is useful context.
     
-    # Save to CSV
-    output_file = 'port_traffic.csv'
+    # Save to Parquet (typed, columnar; Arrival_Date stays datetime64)
+    output_file = 'port_traffic.parquet'
     try:
-        df.to_csv(output_file, index=False)
+        df.to_parquet(output_file, index=False, compression='zstd')
         print(f"Successfully generated {output_file} with {len(df)} records.")
     except Exception as e:
         print(f"Error saving file: {e}")
 
+    # Optional CSV export for debugging
+    if export_csv:
+        csv_file = 'port_traffic.csv'
+        try:
+            df.to_csv(csv_file, index=False)
+            print(f"Exported debug copy to {csv_file}.")
+        except Exception as e:
+            print(f"Error saving file: {e}")
+
 if __name__ == "__main__":
-    generate_data()
+    generate_data(export_csv='--csv' in sys.argv)